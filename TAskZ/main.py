@@ -1,21 +1,309 @@
 import pandas as pd
 import numpy as np
+import logging
 import warnings
 from datetime import datetime
 import re
 import unicodedata
+import functools
+from concurrent.futures import ThreadPoolExecutor
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
+# Parquet export and the Numba text path need pyarrow; the rest works without it
+try:
+    import pyarrow
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Optional compiled text cleaning (OlistDataPreparation(use_numba=True))
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Optional fused evaluation of the per-dataset range checks
+try:
+    import numexpr
+    HAS_NUMEXPR = True
+except ImportError:
+    HAS_NUMEXPR = False
+
+# Common Portuguese character fixes (UTF-8 bytes decoded as Latin-1)
+TEXT_REPLACEMENTS = {
+    'Ã£': 'ã',
+    'Ã¡': 'á',
+    'Ã©': 'é',
+    'Ã­': 'í',
+    'Ã³': 'ó',
+    'Ãº': 'ú',
+    'Ã§': 'ç',
+    'Ã': 'à',
+    'Ã¢': 'â',
+    'Ãª': 'ê',
+    'Ã´': 'ô',
+    'Ã¼': 'ü'
+}
+
+# Single-pass alternation; longer keys first so 'Ã¢' wins over the bare 'Ã'
+TEXT_REPLACEMENTS_RE = re.compile(
+    '|'.join(map(re.escape, sorted(TEXT_REPLACEMENTS, key=len, reverse=True)))
+)
+
+# Lead characters of two-byte UTF-8 sequences (C2/C3) once read as Latin-1;
+# only values containing one of them can need repair
+MOJIBAKE_MARKERS_RE = re.compile('[\u00c2\u00c3]')
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _is_strict_utf8(buf, start, end):
+        """Mirror Python's strict UTF-8 decoder, also rejecting an encoded U+FFFD"""
+        k = start
+        while k < end:
+            b = buf[k]
+            if b < 0x80:
+                k += 1
+                continue
+            if 0xC2 <= b <= 0xDF:
+                n = 1
+            elif 0xE0 <= b <= 0xEF:
+                n = 2
+            elif 0xF0 <= b <= 0xF4:
+                n = 3
+            else:
+                return False
+            if k + n >= end:
+                return False
+            lo = 0xA0 if b == 0xE0 else 0x90 if b == 0xF0 else 0x80
+            hi = 0x9F if b == 0xED else 0x8F if b == 0xF4 else 0xBF
+            if not lo <= buf[k + 1] <= hi:
+                return False
+            for m in range(2, n + 1):
+                if not 0x80 <= buf[k + m] <= 0xBF:
+                    return False
+            if b == 0xEF and buf[k + 1] == 0xBF and buf[k + 2] == 0xBD:
+                return False
+            k += n + 1
+        return True
+
+    @njit(cache=True)
+    def _fix_mojibake_bytes(data, offsets):
+        """
+        Latin-1 round trip over an Arrow string buffer; output never grows
+
+        Per row status: 0 untouched, 1 repaired (still needs NFC), 2 marked
+        but not repairable, left as-is for the TEXT_REPLACEMENTS fallback.
+        """
+        out = np.empty_like(data)
+        out_offsets = np.empty_like(offsets)
+        status = np.zeros(len(offsets) - 1, dtype=np.uint8)
+        out_offsets[0] = 0
+        j = 0
+        for row in range(len(offsets) - 1):
+            start = offsets[row]
+            end = offsets[row + 1]
+            marked = False
+            latin1 = True
+            for i in range(start, end - 1):
+                if data[i] == 0xC3 and (data[i + 1] == 0x82 or data[i + 1] == 0x83):
+                    marked = True
+                elif data[i] >= 0xC4:
+                    latin1 = False
+            if end > start and data[end - 1] >= 0xC4:
+                latin1 = False
+            
+            if marked and latin1:
+                # Each character is at most one Latin-1 byte: C2 XX -> XX, C3 XX -> XX + 0x40
+                k = j
+                i = start
+                while i < end:
+                    b = data[i]
+                    if b == 0xC2:
+                        out[k] = data[i + 1]
+                        i += 2
+                    elif b == 0xC3:
+                        out[k] = data[i + 1] + 0x40
+                        i += 2
+                    else:
+                        out[k] = b
+                        i += 1
+                    k += 1
+                if _is_strict_utf8(out, j, k):
+                    status[row] = 1
+                    j = k
+                    out_offsets[row + 1] = j
+                    continue
+            
+            if marked:
+                status[row] = 2
+            for i in range(start, end):
+                out[j] = data[i]
+                j += 1
+            out_offsets[row + 1] = j
+        return out[:j], out_offsets, status
+
+# Per-dataset read_csv options so timestamps are parsed while the file is read
+# and columns land in compact dtypes: string ids, float32 money/coordinates and
+# categories for low-cardinality labels. Integer columns use the nullable
+# pandas dtypes (Int32, ...) so a blank value cannot fail the whole file
+DATASET_SCHEMAS = {
+    'orders': {
+        'parse_dates': [
+            'order_purchase_timestamp',
+            'order_approved_at',
+            'order_delivered_carrier_date',
+            'order_delivered_customer_date',
+            'order_estimated_delivery_date'
+        ],
+        'dtype': {
+            'order_id': 'string',
+            'customer_id': 'string',
+            'order_status': 'category'
+        }
+    },
+    'order_items': {
+        'parse_dates': ['shipping_limit_date'],
+        'dtype': {
+            'order_id': 'string',
+            'order_item_id': 'Int16',
+            'product_id': 'string',
+            'seller_id': 'string',
+            'price': 'float32',
+            'freight_value': 'float32'
+        }
+    },
+    'customers': {
+        'dtype': {
+            'customer_id': 'string',
+            'customer_unique_id': 'string',
+            'customer_zip_code_prefix': 'Int32',
+            'customer_state': 'category'
+        }
+    },
+    'products': {
+        'dtype': {
+            'product_id': 'string'
+        }
+    },
+    'sellers': {
+        'dtype': {
+            'seller_id': 'string',
+            'seller_zip_code_prefix': 'Int32',
+            'seller_state': 'category'
+        }
+    },
+    'payments': {
+        'dtype': {
+            'order_id': 'string',
+            'payment_type': 'category',
+            'payment_value': 'float32'
+        }
+    },
+    'reviews': {
+        'parse_dates': ['review_creation_date', 'review_answer_timestamp'],
+        'dtype': {
+            'review_id': 'string',
+            'order_id': 'string',
+            'review_score': 'float32'
+        }
+    },
+    'geolocation': {
+        'dtype': {
+            'geolocation_zip_code_prefix': 'Int32',
+            'geolocation_lat': 'float32',
+            'geolocation_lng': 'float32',
+            'geolocation_state': 'category'
+        }
+    }
+}
+
+# Declarative cleaning rules, applied by OlistDataPreparation.clean_dataset
+# in a fixed order: fix text encoding, parse dates, drop rows failing the
+# range checks (inclusive (low, high), None = unbounded) or allowed values,
+# then drop duplicates on dedup_subset (None = whole row; omit to keep all).
+# dedup_first drops the duplicates before the row checks instead
+CLEANING_SPEC = {
+    'geolocation': {
+        'text_cols': ['geolocation_city'],
+        'range_checks': {
+            'geolocation_lat': (-90, 90),
+            'geolocation_lng': (-180, 180)
+        },
+        'dedup_subset': ['geolocation_zip_code_prefix'],
+        'dedup_label': 'zip codes',
+        'dedup_first': True
+    },
+    'orders': {
+        'date_cols': [
+            'order_purchase_timestamp',
+            'order_approved_at',
+            'order_delivered_carrier_date',
+            'order_delivered_customer_date',
+            'order_estimated_delivery_date'
+        ],
+        'allowed_values': {
+            'order_status': ['delivered', 'shipped', 'processing', 'canceled', 'invoiced', 'created']
+        },
+        'dedup_subset': ['order_id'],
+        'dedup_first': True
+    },
+    'order_items': {
+        'date_cols': ['shipping_limit_date'],
+        'range_checks': {
+            'price': (0, None),
+            'freight_value': (0, None)
+        },
+        'dedup_subset': None
+    },
+    'customers': {
+        'text_cols': ['customer_city'],
+        'dedup_subset': ['customer_unique_id']
+    },
+    'sellers': {
+        'text_cols': ['seller_city'],
+        'dedup_subset': ['seller_id']
+    },
+    'products': {
+        'dedup_subset': ['product_id']
+    },
+    'payments': {
+        'range_checks': {
+            'payment_value': (0, None)
+        }
+    },
+    'reviews': {
+        'date_cols': ['review_creation_date', 'review_answer_timestamp'],
+        'text_cols': ['review_comment_title', 'review_comment_message'],
+        'range_checks': {
+            'review_score': (1, 5)
+        },
+        'dedup_subset': ['review_id']
+    }
+}
+
 class OlistDataPreparation:
     """
     Comprehensive data preparation pipeline for Olist E-commerce dataset
     Team A - Data Acquisition & Preparation
     """
     
-    def __init__(self):
+    def __init__(self, use_numba=False):
+        """
+        Parameters:
+        use_numba (bool): Clean text columns with the compiled byte-level
+            Latin-1 round trip; output is identical to the default path
+            (requires numba and pyarrow)
+        """
+        if use_numba and not (HAS_NUMBA and HAS_PYARROW):
+            raise ImportError("use_numba=True requires both numba and pyarrow")
+        
         self.datasets = {}
         self.master_dataset = None
         self.data_quality_report = {}
+        self.use_numba = use_numba
         
     def load_datasets(self, file_paths):
         """
@@ -35,226 +323,283 @@ class OlistDataPreparation:
             'product_translation': 'product_category_name_translation.csv'
         }
         """
-        print("=== LOADING DATASETS ===")
+        logger.info("=== LOADING DATASETS ===")
         
         for name, path in file_paths.items():
+            schema = DATASET_SCHEMAS.get(name, {})
             try:
-                self.datasets[name] = pd.read_csv(path)
-                print(f"Loaded {name}: {self.datasets[name].shape}")
+                # Stays on the C parser: engine='pyarrow' rejects quoted review
+                # text spanning lines, and with a dtype map it fails on blanks
+                # in integer columns the map does not list; either drops a table
+                self.datasets[name] = pd.read_csv(
+                    path,
+                    engine='c',
+                    date_format='ISO8601' if 'parse_dates' in schema else None,
+                    **schema
+                )
+                logger.info("Loaded %s: %s", name, self.datasets[name].shape)
             except Exception as e:
-                print(f"Error loading {name}: {e}")
+                logger.error("Error loading %s: %s", name, e)
     
     def assess_data_quality(self):
         """Generate initial data quality assessment"""
-        print("\n=== DATA QUALITY ASSESSMENT ===")
+        logger.info("\n=== DATA QUALITY ASSESSMENT ===")
         
         for name, df in self.datasets.items():
-            missing_pct = (df.isnull().sum() / len(df) * 100).round(2)
+            # One null-count pass per frame; the per-column result is tiny, so
+            # filter it once and reuse it for the report and the log
+            missing_pct = (df.isna().sum() / len(df) * 100).round(2)
+            missing_pct = missing_pct[missing_pct > 0]
             duplicates = df.duplicated().sum()
             
             self.data_quality_report[name] = {
                 'shape': df.shape,
-                'missing_values': missing_pct[missing_pct > 0].to_dict(),
+                'missing_values': missing_pct.to_dict(),
                 'duplicates': duplicates,
                 'dtypes': df.dtypes.to_dict()
             }
             
-            print(f"\n{name.upper()}:")
-            print(f"  Shape: {df.shape}")
-            print(f"  Duplicates: {duplicates}")
-            if missing_pct[missing_pct > 0].any():
-                print(f"  Missing values: {dict(missing_pct[missing_pct > 0])}")
+            logger.info("\n%s:", name.upper())
+            logger.info("  Shape: %s", df.shape)
+            logger.info("  Duplicates: %s", duplicates)
+            if not missing_pct.empty:
+                logger.info("  Missing values: %s", missing_pct.to_dict())
     
     def clean_text_encoding(self, text):
         """Fix encoding issues in text fields"""
         if pd.isna(text):
             return text
         
-        # Common Portuguese character fixes
-        replacements = {
-            'Ã£': 'ã',
-            'Ã¡': 'á',
-            'Ã©': 'é',
-            'Ã­': 'í',
-            'Ã³': 'ó',
-            'Ãº': 'ú',
-            'Ã§': 'ç',
-            'Ã': 'à',
-            'Ã¢': 'â',
-            'Ãª': 'ê',
-            'Ã´': 'ô',
-            'Ã¼': 'ü'
-        }
-        
         text_str = str(text)
-        for old, new in replacements.items():
-            text_str = text_str.replace(old, new)
+        if not MOJIBAKE_MARKERS_RE.search(text_str):
+            return text_str
         
-        return text_str
+        try:
+            return unicodedata.normalize('NFC', text_str.encode('latin-1').decode('utf-8'))
+        except UnicodeError:
+            return TEXT_REPLACEMENTS_RE.sub(lambda m: TEXT_REPLACEMENTS[m.group(0)], text_str)
+    
+    def clean_text_series(self, series):
+        """Fix encoding issues in a whole text column in one vectorized pass"""
+        # All-missing columns are read as float and have nothing to fix
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            return series
+
+        if self.use_numba:
+            return self._clean_text_series_numba(series)
+
+        return self._fix_mojibake(series)
+    
+    def _fix_mojibake(self, series):
+        """
+        Undo UTF-8 text that was decoded as Latin-1 by encoding it back
+        
+        Only values containing a mojibake lead character are touched. Values
+        that cannot make the round trip (characters outside Latin-1, or a
+        continuation byte lost upstream) fall back to TEXT_REPLACEMENTS.
+        """
+        text = series.reset_index(drop=True)
+        marked = text[text.str.contains(MOJIBAKE_MARKERS_RE, na=False)]
+        if marked.empty:
+            return series
+        
+        latin1 = marked[~marked.str.contains(r'[^\x00-\xff]')]
+        repaired = latin1.str.encode('latin-1').str.decode('utf-8', errors='replace')
+        repaired = repaired[~repaired.str.contains('\ufffd', regex=False)].str.normalize('NFC')
+        
+        residual = marked.drop(repaired.index).str.replace(
+            TEXT_REPLACEMENTS_RE,
+            lambda m: TEXT_REPLACEMENTS[m.group(0)],
+            regex=True
+        )
+        
+        text.loc[repaired.index] = repaired
+        text.loc[residual.index] = residual
+        
+        return text.set_axis(series.index)
+    
+    def _clean_text_series_numba(self, series):
+        """
+        Run the compiled Latin-1 round trip over the column's UTF-8 buffer
+        
+        Output matches _fix_mojibake: repaired values are NFC-normalized here
+        and values the kernel cannot repair are handed to _fix_mojibake.
+        """
+        arr = pyarrow.array(series, type=pyarrow.large_string(), from_pandas=True)
+        if isinstance(arr, pyarrow.ChunkedArray):
+            arr = arr.combine_chunks()
+        
+        _, offsets, data = arr.buffers()
+        if data is None:
+            return series
+        
+        # Sliced arrays share their parent's buffers, so honour arr.offset; the
+        # rebuilt array starts at zero and gets a fresh validity bitmap
+        out_data, out_offsets, status = _fix_mojibake_bytes(
+            np.frombuffer(data, dtype=np.uint8),
+            np.frombuffer(offsets, dtype=np.int64)[arr.offset:arr.offset + len(arr) + 1]
+        )
+        if not status.any():
+            return series
+        
+        validity = arr.is_valid().buffers()[1] if arr.null_count else None
+        fixed = pyarrow.LargeStringArray.from_buffers(
+            len(arr),
+            pyarrow.py_buffer(out_offsets),
+            pyarrow.py_buffer(out_data),
+            validity,
+            arr.null_count
+        )
+        
+        text = fixed.to_pandas()
+        repaired = status == 1
+        text[repaired] = text[repaired].str.normalize('NFC')
+        residual = status == 2
+        if residual.any():
+            text[residual] = self._fix_mojibake(series[residual]).to_numpy()
+        
+        return text.set_axis(series.index).rename(series.name).astype(series.dtype)
     
     def standardize_dates(self, df, date_columns):
         """Convert date columns to proper datetime format"""
+        # Parsed columns are collected and applied with assign so the frame
+        # passed in (often the one stored in self.datasets) is never mutated
+        parsed = {}
         for col in date_columns:
-            if col in df.columns:
-                # Handle the ######## issue (likely Excel display problem)
-                df[col] = df[col].astype(str)
-                df[col] = df[col].replace(['########', 'nan', 'NaN'], pd.NaT)
-                
+            # Columns already parsed by read_csv are left as they are; only
+            # columns that failed to parse at load time fall through to here
+            if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+                # Olist timestamps are ISO8601; an explicit format avoids per-element
+                # format inference and cache=True parses each distinct value once.
+                # errors='coerce' turns the ######## Excel artifact, 'nan' strings
+                # and missing values into NaT directly
                 try:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
+                    parsed[col] = pd.to_datetime(df[col], format='ISO8601', errors='coerce', cache=True)
                 except:
-                    print(f"Warning: Could not parse dates in {col}")
+                    logger.warning("Could not parse dates in %s", col)
         
-        return df
+        return df.assign(**parsed) if parsed else df
     
-    def clean_geolocation(self):
-        """Clean geolocation dataset"""
-        print("\n=== CLEANING GEOLOCATION ===")
-        
-        if 'geolocation' not in self.datasets:
-            return
+    def valid_rows_mask(self, df, range_checks=None, allowed_values=None):
+        """
+        Combine all row checks of a dataset into a single boolean array
         
-        geo = self.datasets['geolocation'].copy()
+        Range checks are fused into one numexpr expression over the raw
+        arrays when numexpr is installed, otherwise reduced with NumPy.
+        NaN fails every comparison. Returns None when there is nothing to check.
+        """
+        conditions = []
+        for col, (low, high) in (range_checks or {}).items():
+            if low is not None:
+                conditions.append((col, '>=', low))
+            if high is not None:
+                conditions.append((col, '<=', high))
+        
+        mask = None
+        if conditions:
+            # Nullable extension columns (Int32, ...) become float with NaN for <NA>
+            arrays = {
+                col: df[col].to_numpy(dtype='float64', na_value=np.nan)
+                if isinstance(df[col].dtype, pd.api.extensions.ExtensionDtype)
+                else df[col].to_numpy()
+                for col, _, _ in conditions
+            }
+            if HAS_NUMEXPR:
+                expression = ' & '.join(f"({col} {op} {bound})" for col, op, bound in conditions)
+                mask = numexpr.evaluate(expression, local_dict=arrays)
+            else:
+                compare = {'>=': np.greater_equal, '<=': np.less_equal}
+                mask = functools.reduce(np.logical_and, (
+                    compare[op](arrays[col], bound) for col, op, bound in conditions
+                ))
+        
+        # On categorical columns isin compares integer codes
+        for col, values in (allowed_values or {}).items():
+            allowed = df[col].isin(values).to_numpy()
+            mask = allowed if mask is None else mask & allowed
+        
+        return mask
+    
+    def clean_dataset(self, name):
+        """
+        Clean one dataset according to its CLEANING_SPEC entry
         
-        # Clean city names with encoding issues
-        geo['geolocation_city'] = geo['geolocation_city'].apply(self.clean_text_encoding)
+        Returns the cleaned dataframe (also stored back in self.datasets),
+        or None if the dataset was not loaded.
+        """
+        logger.info("\n=== CLEANING %s ===", name.replace('_', ' ').upper())
         
-        # Remove duplicates - keep first occurrence
-        before_dedup = len(geo)
-        geo = geo.drop_duplicates(subset=['geolocation_zip_code_prefix'], keep='first')
-        after_dedup = len(geo)
+        if name not in self.datasets:
+            return None
         
-        print(f"Removed {before_dedup - after_dedup} duplicate zip codes")
+        spec = CLEANING_SPEC[name]
+        df = self.datasets[name]
         
-        # Validate coordinates
-        geo = geo[
-            (geo['geolocation_lat'].between(-90, 90)) & 
-            (geo['geolocation_lng'].between(-180, 180))
-        ]
+        # Fix encoding issues in text fields
+        text_cols = [col for col in spec.get('text_cols', []) if col in df.columns]
+        if text_cols:
+            df = df.assign(**{col: self.clean_text_series(df[col]) for col in text_cols})
         
-        self.datasets['geolocation'] = geo
-    
-    def clean_orders(self):
-        """Clean orders dataset"""
-        print("\n=== CLEANING ORDERS ===")
+        # Standardize date columns
+        if spec.get('date_cols'):
+            df = self.standardize_dates(df, spec['date_cols'])
         
-        if 'orders' not in self.datasets:
-            return
+        # Geolocation and orders keep the first row per key before filtering
+        if spec.get('dedup_first'):
+            df = self._drop_duplicates(df, name, spec)
         
-        orders = self.datasets['orders'].copy()
+        # Drop invalid rows with one mask
+        mask = self.valid_rows_mask(df, spec.get('range_checks'), spec.get('allowed_values'))
+        if mask is not None:
+            df = df[mask]
         
-        # Standardize date columns
-        date_cols = [
-            'order_purchase_timestamp',
-            'order_approved_at', 
-            'order_delivered_carrier_date',
-            'order_delivered_customer_date',
-            'order_estimated_delivery_date'
-        ]
+        if not spec.get('dedup_first'):
+            df = self._drop_duplicates(df, name, spec)
         
-        orders = self.standardize_dates(orders, date_cols)
+        self.datasets[name] = df
+        return df
+    
+    def _drop_duplicates(self, df, name, spec):
+        """Remove duplicates on the spec's dedup_subset (keep first occurrence)"""
+        if 'dedup_subset' not in spec:
+            return df
         
-        # Remove duplicates
-        before_dedup = len(orders)
-        orders = orders.drop_duplicates(subset=['order_id'])
-        after_dedup = len(orders)
+        before_dedup = len(df)
+        df = df.drop_duplicates(subset=spec['dedup_subset'], keep='first')
+        after_dedup = len(df)
         
         if before_dedup != after_dedup:
-            print(f"Removed {before_dedup - after_dedup} duplicate orders")
-        
-        # Validate order status
-        valid_statuses = ['delivered', 'shipped', 'processing', 'canceled', 'invoiced', 'created']
-        orders = orders[orders['order_status'].isin(valid_statuses)]
+            label = spec.get('dedup_label', name.replace('_', ' '))
+            logger.info("Removed %d duplicate %s", before_dedup - after_dedup, label)
         
-        self.datasets['orders'] = orders
+        return df
+    
+    def clean_geolocation(self):
+        """Clean geolocation dataset"""
+        self.clean_dataset('geolocation')
+    
+    def clean_orders(self):
+        """Clean orders dataset"""
+        self.clean_dataset('orders')
     
     def clean_order_items(self):
         """Clean order items dataset"""
-        print("\n=== CLEANING ORDER ITEMS ===")
-        
-        if 'order_items' not in self.datasets:
-            return
-        
-        items = self.datasets['order_items'].copy()
-        
-        items = self.standardize_dates(items, ['shipping_limit_date'])
-        
-        # Remove negative prices and freight values
-        items = items[
-            (items['price'] >= 0) & 
-            (items['freight_value'] >= 0)
-        ]
-        
-        # Remove duplicates
-        before_dedup = len(items)
-        items = items.drop_duplicates()
-        after_dedup = len(items)
-        
-        if before_dedup != after_dedup:
-            print(f"Removed {before_dedup - after_dedup} duplicate order items")
-        
-        self.datasets['order_items'] = items
+        self.clean_dataset('order_items')
     
     def clean_customers(self):
         """Clean customers dataset"""
-        print("\n=== CLEANING CUSTOMERS ===")
-        
-        if 'customers' not in self.datasets:
-            return
-        
-        customers = self.datasets['customers'].copy()
-        
-        customers['customer_city'] = customers['customer_city'].apply(self.clean_text_encoding)
-        
-        # Remove duplicates (keep first unique customer)
-        before_dedup = len(customers)
-        customers = customers.drop_duplicates(subset=['customer_unique_id'], keep='first')
-        after_dedup = len(customers)
-        
-        if before_dedup != after_dedup:
-            print(f"Removed {before_dedup - after_dedup} duplicate customers")
-        
-        self.datasets['customers'] = customers
+        self.clean_dataset('customers')
     
     def clean_sellers(self):
         """Clean sellers dataset"""
-        print("\n=== CLEANING SELLERS ===")
-        
-        if 'sellers' not in self.datasets:
-            return
-        
-        sellers = self.datasets['sellers'].copy()
-        
-        # Clean city names
-        sellers['seller_city'] = sellers['seller_city'].apply(self.clean_text_encoding)
-        
-        # Remove duplicates
-        before_dedup = len(sellers)
-        sellers = sellers.drop_duplicates(subset=['seller_id'])
-        after_dedup = len(sellers)
-        
-        if before_dedup != after_dedup:
-            print(f"Removed {before_dedup - after_dedup} duplicate sellers")
-        
-        self.datasets['sellers'] = sellers
+        self.clean_dataset('sellers')
     
     def clean_products(self):
         """Clean products dataset"""
-        print("\n=== CLEANING PRODUCTS ===")
-        
-        if 'products' not in self.datasets:
+        products = self.clean_dataset('products')
+        if products is None:
             return
         
-        products = self.datasets['products'].copy()
-        
-        # Remove duplicates
-        before_dedup = len(products)
-        products = products.drop_duplicates(subset=['product_id'])
-        after_dedup = len(products)
-        
-        if before_dedup != after_dedup:
-            print(f"Removed {before_dedup - after_dedup} duplicate products")
-        
         # Add English category names if translation available
         if 'product_translation' in self.datasets:
             translation = self.datasets['product_translation']
@@ -266,84 +611,66 @@ class OlistDataPreparation:
         
         # Fill missing dimensions with median values by category
         numeric_cols = ['product_weight_g', 'product_length_cm', 'product_height_cm', 'product_width_cm']
-        
-        for col in numeric_cols:
-            if col in products.columns:
-                products[col] = products.groupby('product_category_name')[col].transform(
-                    lambda x: x.fillna(x.median())
-                )
+        numeric_cols = [col for col in numeric_cols if col in products.columns]
+        
+        if numeric_cols:
+            # As a categorical the ~70 category names become integer codes, so
+            # mapping the per-category medians back is a take on those codes
+            category = products['product_category_name'].astype('category')
+            dimensions = products[numeric_cols].astype('float32')
+            medians = dimensions.groupby(category, observed=True).median()
+            
+            products = products.assign(
+                product_category_name=category,
+                **{
+                    col: dimensions[col].fillna(category.map(medians[col]).astype('float32'))
+                    for col in numeric_cols
+                }
+            )
         
         self.datasets['products'] = products
     
     def clean_payments(self):
         """Clean payments dataset"""
-        print("\n=== CLEANING PAYMENTS ===")
-        
-        if 'payments' not in self.datasets:
+        payments = self.clean_dataset('payments')
+        if payments is None:
             return
         
-        payments = self.datasets['payments'].copy()
-        
-        # Remove negative payment values
-        payments = payments[payments['payment_value'] >= 0]
-        
-        # Standardize payment types
-        payments['payment_type'] = payments['payment_type'].str.lower().str.strip()
+        # Standardize payment types (on a categorical column the string ops
+        # run once per category rather than once per row)
+        payments = payments.assign(payment_type=payments['payment_type'].str.lower().str.strip())
         
         self.datasets['payments'] = payments
     
     def clean_reviews(self):
         """Clean reviews dataset"""
-        print("\n=== CLEANING REVIEWS ===")
-        
-        if 'reviews' not in self.datasets:
-            return
-        
-        reviews = self.datasets['reviews'].copy()
-        
-        # Standardize dates
-        date_cols = ['review_creation_date', 'review_answer_timestamp']
-        reviews = self.standardize_dates(reviews, date_cols)
-        
-        # Clean text fields
-        text_cols = ['review_comment_title', 'review_comment_message']
-        for col in text_cols:
-            if col in reviews.columns:
-                reviews[col] = reviews[col].apply(self.clean_text_encoding)
-        
-        # Validate review scores (should be 1-5)
-        reviews = reviews[reviews['review_score'].between(1, 5)]
-        
-        # Remove duplicates
-        before_dedup = len(reviews)
-        reviews = reviews.drop_duplicates(subset=['review_id'])
-        after_dedup = len(reviews)
-        
-        if before_dedup != after_dedup:
-            print(f"Removed {before_dedup - after_dedup} duplicate reviews")
-        
-        self.datasets['reviews'] = reviews
+        self.clean_dataset('reviews')
     
     def create_master_dataset(self):
         """Merge all datasets into a comprehensive master dataset"""
-        print("\n=== CREATING MASTER DATASET ===")
+        logger.info("\n=== CREATING MASTER DATASET ===")
         
         # Start with orders as the base
         if 'orders' not in self.datasets:
-            print("Error: Orders dataset not found!")
+            logger.error("Orders dataset not found!")
             return
         
         master = self.datasets['orders'].copy()
-        print(f"Starting with orders: {master.shape}")
+        # Shapes after each step, logged as one table once the merge is done
+        merge_steps = [('orders', master.shape)]
+        
+        # Lookup tables (customers, products, sellers, per-order aggregates,
+        # geolocation) are unique on their key, so they are joined against
+        # their index; order items are one-to-many and stay a regular merge
         
         # Add customer information
         if 'customers' in self.datasets:
-            master = master.merge(
-                self.datasets['customers'],
+            master = master.join(
+                self.datasets['customers'].set_index('customer_id'),
                 on='customer_id',
                 how='left'
             )
-            print(f"After adding customers: {master.shape}")
+            merge_steps.append(('customers', master.shape))
         
         # Add order items (this will create multiple rows per order)
         if 'order_items' in self.datasets:
@@ -352,40 +679,47 @@ class OlistDataPreparation:
                 on='order_id',
                 how='left'
             )
-            print(f"After adding order items: {master.shape}")
+            merge_steps.append(('order items', master.shape))
         
         # Add product information
         if 'products' in self.datasets:
-            master = master.merge(
-                self.datasets['products'],
+            master = master.join(
+                self.datasets['products'].set_index('product_id'),
                 on='product_id',
                 how='left'
             )
-            print(f"After adding products: {master.shape}")
+            merge_steps.append(('products', master.shape))
         
         # Add seller information
         if 'sellers' in self.datasets:
-            master = master.merge(
-                self.datasets['sellers'],
+            master = master.join(
+                self.datasets['sellers'].set_index('seller_id'),
                 on='seller_id',
                 how='left'
             )
-            print(f"After adding sellers: {master.shape}")
+            merge_steps.append(('sellers', master.shape))
         
         # Add payment information (aggregate by order)
         if 'payments' in self.datasets:
-            payments_agg = self.datasets['payments'].groupby('order_id').agg({
-                'payment_type': lambda x: ', '.join(x.unique()),
+            payments = self.datasets['payments']
+            
+            # Join the distinct payment types per order; most orders use a single
+            # type, so only the few multi-type orders go through the string join
+            types = payments.drop_duplicates(subset=['order_id', 'payment_type'])
+            multi_type = types['order_id'].duplicated(keep=False)
+            payment_types = pd.concat([
+                types.loc[~multi_type].set_index('order_id')['payment_type'],
+                types.loc[multi_type].groupby('order_id', sort=False)['payment_type'].agg(', '.join)
+            ])
+            
+            payments_agg = payments.groupby('order_id').agg({
                 'payment_installments': 'max',
                 'payment_value': 'sum'
-            }).reset_index()
+            })
+            payments_agg.insert(0, 'payment_type', payment_types)
             
-            master = master.merge(
-                payments_agg,
-                on='order_id',
-                how='left'
-            )
-            print(f"After adding payments: {master.shape}")
+            master = master.join(payments_agg, on='order_id', how='left')
+            merge_steps.append(('payments', master.shape))
         
         # Add review information
         if 'reviews' in self.datasets:
@@ -393,98 +727,158 @@ class OlistDataPreparation:
                 'review_score': 'mean',
                 'review_creation_date': 'first',
                 'review_comment_message': 'first'
-            }).reset_index()
+            })
             
-            master = master.merge(
-                reviews_agg,
-                on='order_id',
-                how='left'
-            )
-            print(f"After adding reviews: {master.shape}")
+            master = master.join(reviews_agg, on='order_id', how='left')
+            merge_steps.append(('reviews', master.shape))
         
         # Add geolocation for customers
         if 'geolocation' in self.datasets:
-            geo_customers = self.datasets['geolocation'].copy()
-            geo_customers = geo_customers.rename(columns={
+            geo_customers = self.datasets['geolocation'].rename(columns={
                 'geolocation_zip_code_prefix': 'customer_zip_code_prefix',
                 'geolocation_lat': 'customer_lat',
                 'geolocation_lng': 'customer_lng',
                 'geolocation_city': 'customer_geo_city',
                 'geolocation_state': 'customer_geo_state'
-            })
+            }).set_index('customer_zip_code_prefix')
             
-            master = master.merge(
-                geo_customers,
-                on='customer_zip_code_prefix',
-                how='left'
-            )
-            print(f"After adding customer geolocation: {master.shape}")
+            master = master.join(geo_customers, on='customer_zip_code_prefix', how='left')
+            merge_steps.append(('customer geolocation', master.shape))
+        
+        # join() keeps the left index; renumber rows like merge() would
+        master = master.reset_index(drop=True)
         
         # Create additional useful columns
         master['order_item_total'] = master['price'] + master['freight_value']
         
         # Calculate delivery time if possible
         if 'order_purchase_timestamp' in master.columns and 'order_delivered_customer_date' in master.columns:
-            master['delivery_days'] = (
-                master['order_delivered_customer_date'] - master['order_purchase_timestamp']
-            ).dt.days
+            # Whole days on the raw datetime64 arrays (floor, like .dt.days);
+            # rows missing either timestamp stay NaN
+            delivered = master['order_delivered_customer_date'].to_numpy()
+            purchased = master['order_purchase_timestamp'].to_numpy()
+            valid = ~(np.isnat(delivered) | np.isnat(purchased))
+            
+            delivery_days = np.full(len(master), np.nan, dtype='float32')
+            delivery_days[valid] = (delivered[valid] - purchased[valid]) // np.timedelta64(1, 'D')
+            master['delivery_days'] = delivery_days
         
         self.master_dataset = master
-        print(f"\nFinal master dataset shape: {master.shape}")
+        if logger.isEnabledFor(logging.INFO):
+            width = max(len(step) for step, _ in merge_steps)
+            logger.info("%s", "\n".join(
+                f"{step:<{width}}  {rows:>10,} rows  {cols:>3} columns"
+                for step, (rows, cols) in merge_steps
+            ))
+        logger.info("\nFinal master dataset shape: %s", master.shape)
         
         return master
     
-    def export_datasets(self, output_dir='cleaned_data'):
-        """Export cleaned datasets"""
+    def export_datasets(self, output_dir='cleaned_data', file_format='parquet'):
+        """
+        Export cleaned datasets
+        
+        Parameters:
+        output_dir (str): Directory the files are written to
+        file_format (str): 'parquet' (zstd-compressed, keeps dtypes; requires
+            pyarrow) or 'csv'. The parquet master dataset is partitioned by
+            order_status.
+        """
         import os
+        import shutil
+        
+        if file_format not in ('parquet', 'csv'):
+            raise ValueError(f"file_format must be 'parquet' or 'csv', got {file_format!r}")
+        if file_format == 'parquet' and not HAS_PYARROW:
+            raise ImportError("Parquet export requires pyarrow; install it or pass file_format='csv'")
         
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
         
-        print(f"\n=== EXPORTING CLEANED DATASETS to {output_dir}/ ===")
+        logger.info("\n=== EXPORTING CLEANED DATASETS to %s/ ===", output_dir)
         
         # Export individual cleaned datasets
         for name, df in self.datasets.items():
-            filename = f"{output_dir}/cleaned_{name}.csv"
-            df.to_csv(filename, index=False)
-            print(f"Exported {filename}")
+            filename = f"{output_dir}/cleaned_{name}.{file_format}"
+            if file_format == 'parquet':
+                df.to_parquet(filename, engine='pyarrow', compression='zstd', index=False)
+            else:
+                df.to_csv(filename, index=False)
+            logger.info("Exported %s", filename)
         
         # Export master dataset
         if self.master_dataset is not None:
-            master_filename = f"{output_dir}/master_dataset.csv"
-            self.master_dataset.to_csv(master_filename, index=False)
-            print(f"Exported {master_filename}")
+            master_filename = f"{output_dir}/master_dataset.{file_format}"
+            if file_format == 'parquet':
+                # Partitioned writes add files to an existing directory, so clear
+                # the previous run's output first
+                if os.path.isdir(master_filename):
+                    shutil.rmtree(master_filename)
+                self.master_dataset.to_parquet(
+                    master_filename,
+                    engine='pyarrow',
+                    compression='zstd',
+                    index=False,
+                    partition_cols=['order_status']
+                )
+            else:
+                self.master_dataset.to_csv(master_filename, index=False)
+            logger.info("Exported %s", master_filename)
     
-    def run_full_pipeline(self, file_paths):
-        """Run the complete data preparation pipeline"""
-        print("OLIST DATA PREPARATION PIPELINE - TEAM A")
-        print("="*50)
+    def run_full_pipeline(self, file_paths, max_workers=None):
+        """
+        Run the complete data preparation pipeline
+        
+        Parameters:
+        file_paths (dict): Dataset names mapped to CSV paths (see load_datasets)
+        max_workers (int): Threads used for the cleaning steps; defaults to one
+            per step. Pass 1 to clean the datasets sequentially.
+        """
+        logger.info("OLIST DATA PREPARATION PIPELINE - TEAM A")
+        logger.info("=" * 50)
         
         self.load_datasets(file_paths)
         
         self.assess_data_quality()
     
-        self.clean_geolocation()
-        self.clean_orders()
-        self.clean_order_items()
-        self.clean_customers()
-        self.clean_sellers()
-        self.clean_products()
-        self.clean_payments()
-        self.clean_reviews()
+        # Each step reads and replaces only its own entry of self.datasets
+        # (clean_products also reads product_translation, which nothing
+        # rewrites), so they can run concurrently; pandas releases the GIL
+        # in most of its C kernels
+        cleaning_steps = [
+            self.clean_geolocation,
+            self.clean_orders,
+            self.clean_order_items,
+            self.clean_customers,
+            self.clean_sellers,
+            self.clean_products,
+            self.clean_payments,
+            self.clean_reviews
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers or len(cleaning_steps)) as executor:
+            futures = [executor.submit(step) for step in cleaning_steps]
+            for future in futures:
+                future.result()
         
         master = self.create_master_dataset()
         
-        print("\n=== FINAL SUMMARY ===")
-        for name, df in self.datasets.items():
-            print(f"{name}: {df.shape[0]:,} rows, {df.shape[1]} columns")
-        
-        if self.master_dataset is not None:
-            print(f"Master Dataset: {self.master_dataset.shape[0]:,} rows, {self.master_dataset.shape[1]} columns")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n=== FINAL SUMMARY ===")
+            for name, df in self.datasets.items():
+                logger.info("%s: %s rows, %d columns", name, f"{df.shape[0]:,}", df.shape[1])
+            
+            if self.master_dataset is not None:
+                logger.info(
+                    "Master Dataset: %s rows, %d columns",
+                    f"{self.master_dataset.shape[0]:,}",
+                    self.master_dataset.shape[1]
+                )
         
         return self.datasets, self.master_dataset
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     pipeline = OlistDataPreparation()
     
     file_paths = {
@@ -502,4 +896,4 @@ if __name__ == "__main__":
     cleaned_datasets, master_dataset = pipeline.run_full_pipeline(file_paths)
     pipeline.export_datasets('C://Users//91704//Downloads//OlistDataset//Exported_final')
     
-    print("\n Data preparation complete!")
\ No newline at end of file
+    logger.info("\n Data preparation complete!")
\ No newline at end of file